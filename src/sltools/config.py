@@ -0,0 +1,7 @@
+"""Settings shared between the sltools commands."""
+
+import os
+from pathlib import Path
+
+# Directory for slreserve's files and sltools' on-disk caches
+SLTOOLS_DIR = Path(os.environ.get("SLTOOLS_DIR", Path.home() / ".sltools"))
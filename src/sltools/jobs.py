@@ -1,13 +1,78 @@
 """Module interacting with Slurm via squeue."""
 
+import collections
+import concurrent.futures
 import dataclasses
-import datetime
-import json
+import functools
+import operator
+import os
+import re
 import subprocess
+import sys
 import time
 
-
-@dataclasses.dataclass
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+# Characters that delimit the fields of a job name, e.g. "exp-01_seed.2"
+_DELIMITERS = ".-_/:"
+_DELIM_RE = re.compile(f"[{re.escape(_DELIMITERS)}]")
+# Matches everything up to and including the last delimiter
+_UP_TO_LAST_DELIM_RE = re.compile(f".*[{re.escape(_DELIMITERS)}]", re.DOTALL)
+
+# Flat squeue JSON fields read by Job.from_dict, with their defaults
+_JOB_FIELDS = {
+    "job_id": 0,
+    "partition": "",
+    "name": "",
+    "user_name": "",
+    "nice": 0,
+    "nodes": "",
+    "tres_per_node": "",
+    "state_reason": "",
+    "tres_alloc_str": "",
+}
+_JOB_FIELDS_GETTER = operator.itemgetter(*_JOB_FIELDS)
+
+# Sort keys used by sort_jobs; attrgetter extracts them without a Python call
+_RUNNING_SORT_KEY = operator.attrgetter("start_time", "job_id")
+_PENDING_SORT_KEY = operator.attrgetter("nice", "job_id")
+
+# Number of squeue records above which Job.from_dict is run in a thread pool
+_PARALLEL_PARSE_THRESHOLD = 5000
+
+# Timestamp of the last squeue fetch; time_used is measured against it
+_NOW_TS = 0
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_tres_per_node(tres_str: str) -> tuple[tuple[str, int], ...]:
+    """Parses a tres_per_node string into (type, count) pairs.
+
+    Cached since jobs from the same array or batch share the same string.
+    """
+    res = {}
+    # remove "gres/" prefix if present (common in some slurm versions/configs)
+    if tres_str.startswith("gres/"):
+        tres_str = tres_str[5:]
+
+    parts = tres_str.split(",")
+    for part in parts:
+        if ":" in part:
+            # key:val or key:type:val
+            sub = part.split(":")
+            key = sub[0]
+            try:
+                val = int(sub[-1])
+                res[key] = val
+            except ValueError:
+                pass
+    return tuple(res.items())
+
+
+@dataclasses.dataclass(slots=True)
 class Job:
     """Represents a single Slurm job."""
 
@@ -31,25 +96,40 @@ class Job:
         if self.job_state != "RUNNING":
             return "-"
 
-        now = int(time.time())
+        now = _NOW_TS or int(time.time())
         diff = now - self.start_time
-        return str(datetime.timedelta(seconds=diff))
+
+        # Same output as str(datetime.timedelta(seconds=diff)), without the
+        # intermediate object.
+        days, rem = divmod(diff, 86400)
+        hours, rem = divmod(rem, 3600)
+        minutes, seconds = divmod(rem, 60)
+        hms = f"{hours}:{minutes:02d}:{seconds:02d}"
+        if days:
+            return f"{days} day{'' if abs(days) == 1 else 's'}, {hms}"
+        return hms
 
     @staticmethod
     def _parse_memory_from_tres(tres_str: str) -> int:
         """Parses memory from a TRES string."""
         units = {"M": 1, "G": 1024, "T": 1024 * 1024, "K": 1 / 1024}
-        # Look for mem=...
+        # Look for mem=... without splitting the whole string
+        if tres_str.startswith("mem="):
+            start = 4
+        else:
+            start = tres_str.find(",mem=")
+            if start < 0:
+                return 0
+            start += 5
+
+        end = tres_str.find(",", start)
+        val_str = tres_str[start:] if end < 0 else tres_str[start:end]
         try:
-            parts = tres_str.split(",")
-            for part in parts:
-                if part.startswith("mem="):
-                    val_str = part[4:]  # remove "mem="
-                    unit = val_str[-1].upper()
-                    if unit.isdigit():
-                        return int(val_str)  # Default MB
-
-                    return int(float(val_str[:-1]) * units[unit])
+            unit = val_str[-1].upper()
+            if unit.isdigit():
+                return int(val_str)  # Default MB
+
+            return int(float(val_str[:-1]) * units[unit])
         except Exception:
             pass
         return 0
@@ -63,25 +143,7 @@ class Job:
         """
         if not self.tres_per_node:
             return {}
-
-        res = {}
-        # remove "gres/" prefix if present (common in some slurm versions/configs)
-        tres_str = self.tres_per_node
-        if tres_str.startswith("gres/"):
-            tres_str = tres_str[5:]
-
-        parts = tres_str.split(",")
-        for part in parts:
-            if ":" in part:
-                # key:val or key:type:val
-                sub = part.split(":")
-                key = sub[0]
-                try:
-                    val = int(sub[-1])
-                    res[key] = val
-                except ValueError:
-                    pass
-        return res
+        return dict(_parse_tres_per_node(self.tres_per_node))
 
     @classmethod
     def from_dict(cls, data: dict) -> "Job":
@@ -94,9 +156,10 @@ class Job:
             A Job instance with parsed and validated data.
         """
         # Parse node_count
-        node_count = 0
-        if "node_count" in data and isinstance(data["node_count"], dict):
-            node_count = data["node_count"].get("number", 0)
+        try:
+            node_count = data["node_count"]["number"]
+        except (KeyError, TypeError):
+            node_count = 0
 
         # Parse job_state (it's a list)
         state = "UNKNOWN"
@@ -105,47 +168,75 @@ class Job:
             and isinstance(data["job_state"], list)
             and len(data["job_state"]) > 0
         ):
-            state = data["job_state"][0]
+            state = sys.intern(data["job_state"][0])
 
         # Parse start_time
-        start_time = 0
-        if "start_time" in data and isinstance(data["start_time"], dict):
-            start_time = data["start_time"].get("number", 0)
+        try:
+            start_time = data["start_time"]["number"]
+        except (KeyError, TypeError):
+            start_time = 0
 
         # Parse CPUs
-        cpus = 0
-        if "cpus" in data and isinstance(data["cpus"], dict):
-            cpus = data["cpus"].get("number", 0)
+        try:
+            cpus = data["cpus"]["number"]
+        except (KeyError, TypeError):
+            cpus = 0
+
+        # Fetch the flat fields in one call; only fall back to per-key
+        # defaults if squeue left some of them out.
+        try:
+            fields = _JOB_FIELDS_GETTER(data)
+        except KeyError:
+            fields = tuple(data.get(k, v) for k, v in _JOB_FIELDS.items())
+        (
+            job_id,
+            partition,
+            name,
+            user_name,
+            nice,
+            nodelist,
+            tres_per_node,
+            state_reason,
+            tres_alloc,
+        ) = fields
+
+        # Intern the fields coalesce_jobs compares so equal values share one
+        # object and == short-circuits on identity.
+        partition = sys.intern(partition or "")
+        user_name = sys.intern(user_name or "")
+        state_reason = sys.intern(state_reason or "")
 
         # Parse memory from tres_alloc_str (e.g., mem=720000M)
         memory = 0
-        tres_alloc = data.get("tres_alloc_str", "")
         if tres_alloc:
             memory = Job._parse_memory_from_tres(tres_alloc)
 
         return cls(
-            job_id=data.get("job_id", 0),
-            partition=data.get("partition", ""),
-            name=data.get("name", ""),
-            user_name=data.get("user_name", ""),
+            job_id=job_id,
+            partition=partition,
+            name=name,
+            user_name=user_name,
             job_state=state,
             start_time=start_time,
-            nice=data.get("nice", 0),
+            nice=nice,
             node_count=node_count,
-            nodelist=data.get("nodes", ""),
-            tres_per_node=data.get("tres_per_node", ""),
-            state_reason=data.get("state_reason", ""),
+            nodelist=nodelist,
+            tres_per_node=tres_per_node,
+            state_reason=state_reason,
             cpus=cpus,
             memory=memory,
         )
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class JobGroup(Job):
     """Represents a group of similar Slurm jobs."""
 
     ids: list[int] = dataclasses.field(default_factory=list)
-    combined_name: str = ""
+    # Shared name pattern: name_prefix + "[" + ",".join(name_diffs) + "]" + name_suffix
+    name_prefix: str = ""
+    name_diffs: list[str] = dataclasses.field(default_factory=list)
+    name_suffix: str = ""
 
     def __init__(self, job: Job):
         """Initialize from a single job."""
@@ -153,7 +244,31 @@ class JobGroup(Job):
             setattr(self, field.name, getattr(job, field.name))
 
         self.ids = [job.job_id]
-        self.combined_name = job.name
+        self.name_prefix = job.name
+        self.name_diffs = []
+        self.name_suffix = ""
+
+    @property
+    def combined_name(self) -> str:
+        """Returns the merged name, e.g. "exp-[1,2,3].run"."""
+        if not self.name_diffs:
+            return self.name_prefix + self.name_suffix
+        return f"{self.name_prefix}[{','.join(self.name_diffs)}]{self.name_suffix}"
+
+    def match_name(self, name: str) -> str | None:
+        """Returns the part of name between the group's prefix and suffix.
+
+        Returns None if the name does not share the group's prefix and suffix.
+        """
+        start = len(self.name_prefix)
+        end = len(name) - len(self.name_suffix)
+        if (
+            end < start
+            or not name.startswith(self.name_prefix)
+            or not name.endswith(self.name_suffix)
+        ):
+            return None
+        return name[start:end]
 
     @property
     def job_id_str(self) -> str:
@@ -230,32 +345,30 @@ def coalesce_jobs(jobs: list[Job]) -> list[Job]:
             and current_group.state_reason == job.state_reason
         ):
             # 2. Similarity Check
-            name1 = (
-                current_group.combined_name
-                if isinstance(current_group, JobGroup)
-                else current_group.name
-            )
             name2 = job.name
+            L = len(name2)
+            if isinstance(current_group, JobGroup):
+                diff2 = current_group.match_name(name2)
+                res = None if diff2 is None else (None, None, diff2, None)
+            elif L - len(current_group.name) >= max(L // 4, min(5, L // 2)):
+                # The diff is at least as long as the length difference, so
+                # the threshold below would reject this pair anyway.
+                res = None
+            else:
+                res = _get_smart_diff(current_group.name, name2)
 
-            res = _get_smart_diff(name1, name2)
             if res:
                 prefix, diff1, diff2, suffix = res
-                L = len(name2)
                 D = len(diff2)
                 if (D < (L // 4)) or ((D < 5) and (D < (L // 2))):
                     if not isinstance(current_group, JobGroup):
                         current_group = JobGroup(current_group)
+                        current_group.name_prefix = prefix
+                        current_group.name_diffs = [diff1]
+                        current_group.name_suffix = suffix
 
                     current_group.ids.append(job.job_id)
-
-                    if diff1.startswith("[") and diff1.endswith("]"):
-                        existing_diffs = diff1[1:-1]  # "a,b"
-                        new_diffs = f"{existing_diffs},{diff2}"
-                        current_group.combined_name = f"{prefix}[{new_diffs}]{suffix}"
-                    else:
-                        current_group.combined_name = (
-                            f"{prefix}[{diff1},{diff2}]{suffix}"
-                        )
+                    current_group.name_diffs.append(diff2)
 
                     merged = True
 
@@ -278,45 +391,22 @@ def _get_smart_diff(s1: str, s2: str) -> tuple[str, str, str, str] | None:
         return None
 
     # 1. Find Longest Common Prefix
-    prefix_len = 0
-    min_len = min(len(s1), len(s2))
-    while prefix_len < min_len and s1[prefix_len] == s2[prefix_len]:
-        prefix_len += 1
+    prefix_len = len(os.path.commonprefix([s1, s2]))
 
     # 2. Find Longest Common Suffix
-    suffix_len = 0
     # Must stop before overlapping with prefix
-    # Adjust for remaining length
     rem1 = len(s1) - prefix_len
     rem2 = len(s2) - prefix_len
-
-    while (
-        suffix_len < min(rem1, rem2) and s1[-(suffix_len + 1)] == s2[-(suffix_len + 1)]
-    ):
-        suffix_len += 1
-
-    # Initial diff not strictly needed if we recalculate later
-    # diff1 = s1[prefix_len : len(s1) - suffix_len]
-    # diff2 = s2[prefix_len : len(s2) - suffix_len]
+    suffix_len = min(len(os.path.commonprefix([s1[::-1], s2[::-1]])), rem1, rem2)
 
     # 3. Expansion heuristics (Backtrack prefix and suffix to delimiters)
-    delimiters = {".", "-", "_", "/", ":"}  # Added colon just in case
-
-    # Backtrack prefix
-    current_prefix_len = prefix_len
-    while current_prefix_len > 0:
-        char = s1[current_prefix_len - 1]
-        if char in delimiters:
-            break
-        current_prefix_len -= 1
-
-    # Shrink suffix (which effectively moves the boundary leftwards from the end)
-    current_suffix_len = suffix_len
-    while current_suffix_len > 0:
-        char = s1[len(s1) - current_suffix_len]  # First char of suffix
-        if char in delimiters:
-            break
-        current_suffix_len -= 1
+    # Backtrack prefix to just after the last delimiter inside it
+    match = _UP_TO_LAST_DELIM_RE.match(s1, 0, prefix_len)
+    current_prefix_len = match.end() if match else 0
+
+    # Shrink suffix so that it starts at the first delimiter inside it
+    match = _DELIM_RE.search(s1, len(s1) - suffix_len)
+    current_suffix_len = len(s1) - match.start() if match else 0
 
     final_prefix = s1[:current_prefix_len]
     final_suffix = s1[len(s1) - current_suffix_len :] if current_suffix_len > 0 else ""
@@ -333,15 +423,70 @@ def _get_smart_diff(s1: str, s2: str) -> tuple[str, str, str, str] | None:
     return final_prefix, final_diff1, final_diff2, final_suffix
 
 
+def _gil_enabled() -> bool:
+    """Returns whether the interpreter is running with the GIL."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is None or is_gil_enabled()
+
+
 def get_jobs() -> list[Job]:
     """Fetches jobs from squeue and calls sort_jobs."""
-    output = subprocess.check_output(["squeue", "--json"], text=True)
-    data = json.loads(output)
-
-    jobs = [Job.from_dict(j) for j in data.get("jobs", [])]
+    global _NOW_TS
+
+    # Read the raw bytes straight off the pipe and hand them to the parser.
+    args = ["squeue", "--json"]
+    with subprocess.Popen(args, stdout=subprocess.PIPE) as proc:
+        output = proc.stdout.read()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, args)
+    data = _json_loads(output)
+
+    _NOW_TS = int(time.time())
+    records = data.get("jobs", [])
+    if len(records) > _PARALLEL_PARSE_THRESHOLD and not _gil_enabled():
+        # Only worth it on free-threaded builds; with the GIL the workers
+        # would just take turns.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as ex:
+            jobs = list(ex.map(Job.from_dict, records))
+    else:
+        jobs = [Job.from_dict(j) for j in records]
     return sort_jobs(jobs)
 
 
+def get_job_states() -> dict[int, str]:
+    """Fetches only the state of each job from squeue.
+
+    Uses --only-job-state (Slurm >= 24.05), which squeue answers from
+    slurmctld's job state cache instead of a full job info RPC.
+
+    Returns:
+        A dictionary {job_id: job_state}.
+    """
+    global _NOW_TS
+
+    # --states=all matches the jobs listed by `squeue --json`, which include
+    # finished jobs; stderr would otherwise print over sltop's screen.
+    output = subprocess.check_output(
+        [
+            "squeue",
+            "--only-job-state",
+            "--states=all",
+            "--noheader",
+            "--format=%A|%T",
+        ],
+        text=True,
+        stderr=subprocess.DEVNULL,
+    )
+    _NOW_TS = int(time.time())
+
+    states = {}
+    for line in output.splitlines():
+        job_id, _, state = line.partition("|")
+        if job_id.isdigit():
+            states[int(job_id)] = sys.intern(state.strip())
+    return states
+
+
 def sort_jobs(jobs: list[Job]) -> list[Job]:
     """Sorts jobs according to the following logic:
 
@@ -351,37 +496,42 @@ def sort_jobs(jobs: list[Job]) -> list[Job]:
     4. Pending jobs with reason Dependency, sorted by nice.
     5. Failed/Cancelled/Other.
     """
-    jobs.sort(key=lambda j: j.job_id)
-
-    job_categories = {}
+    job_categories = collections.defaultdict(list)
     for j in jobs:
-        if j.job_state == "RUNNING":
-            category = "RUNNING"
-        else:
-            category = j.state_reason
-
-        if category not in job_categories:
-            job_categories[category] = []
+        category = "RUNNING" if j.job_state == "RUNNING" else j.state_reason
         job_categories[category].append(j)
 
-    for category, category_jobs in job_categories.items():
-        if category != "RUNNING":
-            category_jobs.sort(key=lambda j: j.nice)
+    # Each bucket is sorted on its own; job_id breaks ties so that the result
+    # does not depend on the order squeue returned the jobs in.
+    running = job_categories.pop("RUNNING", [])
+    running.sort(key=_RUNNING_SORT_KEY)
+    for category_jobs in job_categories.values():
+        category_jobs.sort(key=_PENDING_SORT_KEY)
+
+    # Remaining buckets are emitted in order of their lowest job id.
+    job_categories = {
+        k: job_categories[k]
+        for k in sorted(
+            job_categories, key=lambda k: min(j.job_id for j in job_categories[k])
+        )
+    }
 
     sorted_jobs = (
-        sorted(job_categories.pop("RUNNING", []), key=lambda j: j.start_time)
+        running
         + job_categories.pop("Resources", [])
         + job_categories.pop("Priority", [])
     )
 
-    for k in job_categories:
+    # Split the remaining buckets into QOS-limited, Dependency and other jobs in
+    # a single pass.
+    other_jobs = []
+    for k, v in job_categories.items():
         if "qos" in k.lower():
-            sorted_jobs += job_categories[k]
-    job_categories = {k: v for k, v in job_categories.items() if "qos" not in k.lower()}
+            sorted_jobs += v
+        elif k != "Dependency":
+            other_jobs += v
 
-    sorted_jobs += job_categories.pop("Dependency", [])
-
-    for k, v in job_categories.items():
-        sorted_jobs += v
+    sorted_jobs += job_categories.get("Dependency", [])
+    sorted_jobs += other_jobs
 
     return sorted_jobs
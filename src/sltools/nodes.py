@@ -1,12 +1,43 @@
 """Module interacting with Slurm via scontrol to get node info."""
 
+import ctypes
+import ctypes.util
 import dataclasses
-import json
+import functools
+import operator
+import os
 import re
+import shutil
 import subprocess
+import time
 
+from .config import SLTOOLS_DIR
 
-@dataclasses.dataclass
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+_PAREN_RE = re.compile(r"\(.*?\)")
+_HOSTLIST_RE = re.compile(r"^([^\[\],]*)(?:\[([0-9,\-]+)\])?([^\[\],]*)$")
+
+# Flat scontrol JSON fields read by Node.from_dict, with their defaults
+_NODE_FIELDS = {
+    "name": "unknown",
+    "cpus": 0,
+    "architecture": "unknown",
+    "state": "UNKNOWN",
+    "gres": "",
+}
+_NODE_FIELDS_GETTER = operator.itemgetter(*_NODE_FIELDS)
+
+# On-disk cache of the Slurm version. The home directory may be shared between
+# clusters, so the cache is kept per host.
+_VERSION_CACHE_FILE = SLTOOLS_DIR / f".slurm_version.{os.uname().nodename}"
+_VERSION_CACHE_TTL = 24 * 60 * 60
+
+
+@dataclasses.dataclass(slots=True)
 class Node:
     """Represents a single Slurm node."""
 
@@ -28,7 +59,7 @@ class Node:
         for part in parts:
             if part.strip().startswith("gpu"):
                 # expected format: gpu[:type]:count[(...)]
-                clean_part = re.sub(r"\(.*?\)", "", part)
+                clean_part = _PAREN_RE.sub("", part) if "(" in part else part
                 subparts = clean_part.split(":")
                 if len(subparts) > 1:
                     try:
@@ -47,8 +78,13 @@ class Node:
         Returns:
             A Node instance with parsed and validated data.
         """
-        # Parse CPUs
-        cpus = data.get("cpus", 0)
+        # Fetch the flat fields in one call; only fall back to per-key
+        # defaults if scontrol left some of them out.
+        try:
+            fields = _NODE_FIELDS_GETTER(data)
+        except KeyError:
+            fields = tuple(data.get(k, v) for k, v in _NODE_FIELDS.items())
+        name, cpus, architecture, state, gres = fields
 
         # Parse memory
         real_memory = data.get("real_memory")
@@ -60,26 +96,23 @@ class Node:
             memory = 0
 
         # Parse GPUs from GRES
-        gres = data.get("gres", "")
         gpus = Node._parse_gpu_count(gres)
 
         return cls(
-            name=data.get("name", "unknown"),
+            name=name,
             cpus=cpus,
             memory=memory,
             gpus=gpus,
-            architecture=data.get("architecture", "unknown"),
-            state=data.get("state", "UNKNOWN"),
+            architecture=architecture,
+            state=state,
         )
 
 
 def get_nodes() -> list[Node]:
     """Fetches nodes from scontrol."""
     try:
-        output = subprocess.check_output(
-            ["scontrol", "show", "nodes", "--json"], text=True
-        )
-        data = json.loads(output)
+        output = subprocess.check_output(["scontrol", "show", "nodes", "--json"])
+        data = _json_loads(output)
     except Exception:
         return []
 
@@ -88,12 +121,112 @@ def get_nodes() -> list[Node]:
     return nodes
 
 
+def _split_nodelist(nodelist: str) -> list[str]:
+    """Splits a nodelist on commas that are not inside brackets."""
+    parts = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(nodelist):
+        if char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(nodelist[start:i])
+            start = i + 1
+    parts.append(nodelist[start:])
+    return parts
+
+
+def _escape_braces(s: str) -> str:
+    """Escapes braces so that s can be embedded in a str.format template."""
+    return s.replace("{", "{{").replace("}", "}}")
+
+
+def _expand_nodelist_python(nodelist: str) -> list[str] | None:
+    """Expands a nodelist in-process.
+
+    Handles a comma-separated list of hosts, each with at most one bracketed
+    range, e.g. "a[01-03,7],b5". Returns None for anything more complex.
+    """
+    names = []
+    for part in _split_nodelist(nodelist):
+        match = _HOSTLIST_RE.match(part)
+        if match is None:
+            return None
+
+        prefix, ranges, suffix = match.groups()
+        if ranges is None:
+            names.append(part)
+            continue
+
+        for rng in ranges.split(","):
+            lo, sep, hi = rng.partition("-")
+            if not lo.isdigit() or (sep and not hi.isdigit()):
+                return None
+            # Format the whole range through map() so the loop runs in C
+            fmt = f"{_escape_braces(prefix)}{{:0{len(lo)}d}}{_escape_braces(suffix)}"
+            names.extend(map(fmt.format, range(int(lo), int(hi or lo) + 1)))
+    return names
+
+
+@functools.lru_cache(maxsize=1)
+def _load_libslurm() -> tuple[ctypes.CDLL, ctypes.CDLL] | None:
+    """Loads libslurm and libc for the hostlist API, or None if unavailable."""
+    path = ctypes.util.find_library("slurm") or "libslurm.so"
+    try:
+        lib = ctypes.CDLL(path, mode=ctypes.RTLD_GLOBAL)
+        libc = ctypes.CDLL(None)
+        lib.slurm_hostlist_create.argtypes = [ctypes.c_char_p]
+        lib.slurm_hostlist_create.restype = ctypes.c_void_p
+        # Returned strings are malloc'd; keep the raw pointer so it can be freed
+        lib.slurm_hostlist_shift.argtypes = [ctypes.c_void_p]
+        lib.slurm_hostlist_shift.restype = ctypes.c_void_p
+        lib.slurm_hostlist_destroy.argtypes = [ctypes.c_void_p]
+        lib.slurm_hostlist_destroy.restype = None
+        libc.free.argtypes = [ctypes.c_void_p]
+        libc.free.restype = None
+    except (OSError, AttributeError):
+        return None
+    return lib, libc
+
+
+def _expand_nodelist_libslurm(nodelist: str) -> list[str] | None:
+    """Expands a nodelist with libslurm's hostlist API, if it is available."""
+    libs = _load_libslurm()
+    if libs is None:
+        return None
+    lib, libc = libs
+
+    hostlist = lib.slurm_hostlist_create(nodelist.encode())
+    if not hostlist:
+        return None
+
+    names = []
+    try:
+        while host := lib.slurm_hostlist_shift(hostlist):
+            names.append(ctypes.string_at(host).decode())
+            libc.free(host)
+    finally:
+        lib.slurm_hostlist_destroy(hostlist)
+    return names
+
+
 def expand_nodelist(nodelist: str) -> list[str]:
     """Expands a Slurm nodelist string into a list of node names."""
     if not nodelist:
         return []
+
+    # Simple lists are expanded in Python; libslurm and then scontrol handle
+    # anything more involved.
+    names = _expand_nodelist_python(nodelist)
+    if names is None:
+        names = _expand_nodelist_libslurm(nodelist)
+    if names is not None:
+        return names
+
     try:
-        # Use scontrol to expand (robust standard way)
+        # Fall back to scontrol for syntax we do not handle ourselves
         output = subprocess.check_output(
             ["scontrol", "show", "hostnames", nodelist], text=True
         )
@@ -102,8 +235,8 @@ def expand_nodelist(nodelist: str) -> list[str]:
         return []
 
 
-def get_slurm_version() -> str:
-    """Returns the Slurm version string."""
+def _query_slurm_version() -> str:
+    """Queries the Slurm version string from squeue."""
     try:
         # squeue --version output: "slurm-wlm 23.11.4"
         output = subprocess.check_output(["squeue", "--version"], text=True).strip()
@@ -113,3 +246,52 @@ def get_slurm_version() -> str:
         return output
     except Exception:
         return "unknown"
+
+
+@functools.lru_cache(maxsize=1)
+def get_slurm_version(refresh: bool = False) -> str:
+    """Returns the Slurm version string.
+
+    The version is also cached on disk for a day, or until squeue is replaced,
+    so that each new process does not have to fork squeue.
+
+    Args:
+        refresh: Ignore the on-disk cache and query squeue again.
+    """
+    if not refresh:
+        try:
+            mtime = _VERSION_CACHE_FILE.stat().st_mtime
+            # A squeue binary newer than the cache means Slurm was upgraded
+            squeue = shutil.which("squeue")
+            upgraded = squeue is not None and os.stat(squeue).st_mtime > mtime
+            if not upgraded and time.time() - mtime < _VERSION_CACHE_TTL:
+                version = _VERSION_CACHE_FILE.read_text().strip()
+                if version:
+                    return version
+        except OSError:
+            pass
+
+    version = _query_slurm_version()
+    if version != "unknown":
+        try:
+            _VERSION_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            # Unique per process, so hosts sharing the directory never collide
+            tmp_path = _VERSION_CACHE_FILE.with_name(
+                f"{_VERSION_CACHE_FILE.name}.{os.getpid()}.tmp"
+            )
+            tmp_path.write_text(version)
+            os.replace(tmp_path, _VERSION_CACHE_FILE)
+        except OSError:
+            pass
+    return version
+
+
+def parse_slurm_version(version: str) -> tuple[int, ...]:
+    """Parses a version string such as "23.11.4" into (23, 11, 4).
+
+    Returns an empty tuple if the version cannot be parsed.
+    """
+    try:
+        return tuple(int(part) for part in version.split("."))
+    except ValueError:
+        return ()
@@ -1,16 +1,41 @@
 """Reserve resources using a "blocker" job."""
 
+from __future__ import annotations
+
+import ctypes
 import getpass
 import os
+import re
+import select
 import subprocess
 import time
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .config import SLTOOLS_DIR
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+# tyro and rich are imported where they are used, keeping `import` cheap
+if TYPE_CHECKING:
+    from rich.console import Console
+
 
-import tyro
-import yaml
-from rich.console import Console
+# inotify event masks, from <sys/inotify.h>
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
 
-SLTOOLS_DIR = Path(os.environ.get("SLTOOLS_DIR", Path.home() / ".sltools"))
+# squeue poll interval while waiting for the job to start; doubles up to the
+# maximum so a long-pending job queries the controller less often, while a
+# job that starts is still noticed within a couple of seconds
+_POLL_INTERVAL = 0.5
+_MAX_POLL_INTERVAL = 2.0
+
+# GPU indices in a gres_detail entry such as "gpu:a100:2(IDX:0-1),shard:..."
+_GPU_IDX_RE = re.compile(r"(?:^|,)gpu(?::[^(,]*)*\(IDX:([^)]*)\)")
 
 
 def check_existing_job(user: str) -> tuple[str, str] | None:
@@ -28,15 +53,14 @@ def check_existing_job(user: str) -> tuple[str, str] | None:
                 f"--users={user}",
                 "--states=R,PD",
                 "--noheader",
-                "--format=%A %T",
+                "--format=%A|%T",
             ],
             text=True,
         ).strip()
         if output:
-            parts = output.split()
-            if len(parts) >= 2:
-                return parts[0], parts[1]
-            return parts[0], "UNKNOWN"
+            # Only the first job is used if there is more than one
+            job_id, _, state = output.splitlines()[0].partition("|")
+            return job_id, state or "UNKNOWN"
     except subprocess.CalledProcessError:
         pass
     return None
@@ -73,8 +97,20 @@ echo "# export CUDA_VISIBLE_DEVICES=$SLURM_JOB_GPUS"
 sleep infinity
 """
     script_path = SLTOOLS_DIR / "_reserve.sh"
-    script_path.write_text(script_content)
-    script_path.chmod(0o755)
+    try:
+        unchanged = script_path.read_text() == script_content and os.access(
+            script_path, os.X_OK
+        )
+    except OSError:
+        unchanged = False
+
+    if not unchanged:
+        # Write to a temporary file and rename it so that a partial write can
+        # never leave a truncated script behind.
+        tmp_path = script_path.with_suffix(".sh.tmp")
+        tmp_path.write_text(script_content)
+        tmp_path.chmod(0o755)
+        os.replace(tmp_path, script_path)
     return script_path
 
 
@@ -86,48 +122,182 @@ def submit_job(script_path: Path) -> str:
     return output.split(";")[0]
 
 
+def _watch_directory(directory: Path) -> int | None:
+    """Returns an inotify fd reporting files created in directory.
+
+    Returns None if inotify is not available (e.g. not on Linux).
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+
+    mask = _IN_CREATE | _IN_MOVED_TO
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
 def wait_for_output_file(job_id: str, console: Console) -> Path:
     """Waits for the output file reserved_<job_id>.yaml to appear."""
     filename = SLTOOLS_DIR / f"reserved_{job_id}.yaml"
-    with console.status(f"[bold green]Waiting for job {job_id} to start..."):
-        while not filename.exists():
-            time.sleep(1)
-
-    time.sleep(1)
+    # Set up the watch before checking for the file so a creation in between
+    # is not missed.
+    watch_fd = _watch_directory(SLTOOLS_DIR)
+    try:
+        with console.status(f"[bold green]Waiting for job {job_id} to start..."):
+            while not filename.exists():
+                if watch_fd is None:
+                    time.sleep(1)
+                    continue
+                # inotify only sees files created from this host, so keep the
+                # 1s timeout for jobs writing to a shared filesystem.
+                rlist, _, _ = select.select([watch_fd], [], [], 1)
+                if rlist:
+                    os.read(watch_fd, 4096)
+    finally:
+        if watch_fd is not None:
+            os.close(watch_fd)
+
+    # The job may still be writing its info; read_job_info waits for it
     return filename
 
 
+def _expand_gres_index(index: str) -> str:
+    """Expands a GRES index list such as "0-1,3" into "0,1,3".
+
+    Raises:
+        ValueError: if the list is not made of integers and ranges.
+    """
+    gpus = []
+    for part in index.split(","):
+        lo, _, hi = part.partition("-")
+        if hi:
+            gpus.extend(str(i) for i in range(int(lo), int(hi) + 1))
+        elif lo:
+            gpus.append(str(int(lo)))
+    return ",".join(gpus)
+
+
+def _scontrol_show(kind: str, name: str) -> dict:
+    """Returns the first record of `scontrol show <kind> <name> --json`."""
+    output = subprocess.check_output(
+        ["scontrol", "show", kind, name, "--json"], stderr=subprocess.DEVNULL
+    )
+    return _json_loads(output)[f"{kind}s"][0]
+
+
+def _wait_via_scontrol(job_id: str, console: Console) -> tuple[str, str] | None:
+    """Waits for the job to start by querying the controller.
+
+    This avoids waiting on the job's output file, which can take a while to
+    show up on a shared filesystem.
+
+    Returns:
+        A tuple of (node, gpus) once the job is running, or None if squeue
+        or scontrol can not be used, in which case the output file should be
+        read instead.
+    """
+    interval = _POLL_INTERVAL
+    try:
+        with console.status(f"[bold green]Waiting for job {job_id} to start..."):
+            while not subprocess.check_output(
+                ["squeue", "-h", "-j", job_id, "-t", "R", "-o", "%B"],
+                text=True,
+                stderr=subprocess.DEVNULL,
+            ).strip():
+                time.sleep(interval)
+                interval = min(interval * 2, _MAX_POLL_INTERVAL)
+
+        job = _scontrol_show("job", job_id)
+        batch_host = job["batch_host"]
+        # The job file recorded `hostname` on the node, which is the node's
+        # NodeHostname rather than its Slurm NodeName.
+        node = _scontrol_show("node", batch_host).get("hostname") or batch_host
+
+        # The GPU indices are the values of $SLURM_JOB_GPUS
+        gpus = ""
+        for detail in job.get("gres_detail", []):
+            match = _GPU_IDX_RE.search(detail)
+            if match:
+                gpus = _expand_gres_index(match.group(1))
+                break
+    except (OSError, subprocess.CalledProcessError, ValueError, LookupError):
+        return None
+    return node, gpus
+
+
+def _parse_job_info(content: str) -> dict:
+    """Parses the flat "key: value" lines written by the sbatch script."""
+    data = {}
+    for line in content.splitlines():
+        if line.startswith("#") or ": " not in line:
+            continue
+        key, value = line.split(": ", 1)
+        data[key.strip()] = value.strip()
+    return data
+
+
+def _read_job_file(yaml_file: Path, timeout: float = 5.0) -> str:
+    """Reads the job's output file once its three "key: value" lines are in.
+
+    The file is opened once and re-read as the job appends to it, since
+    opening files is the expensive operation on shared filesystems.
+    """
+    content = b""
+    deadline = time.monotonic() + timeout
+    with yaml_file.open("rb") as f:
+        while True:
+            content += f.read()
+            if content.count(b"\n") >= 3 or time.monotonic() >= deadline:
+                return content.decode(errors="replace")
+            time.sleep(0.1)
+
+
 def read_job_info(yaml_file: Path) -> dict:
     """Reads the node and GPU info from the YAML file."""
-    for _ in range(5):
+    # A second attempt reopens the file, in case the open handle did not see
+    # the job's writes (e.g. NFS attribute caching).
+    for _ in range(2):
         try:
-            content = yaml_file.read_text()
-            if not content.strip():
-                time.sleep(1)
-                continue
-            data = yaml.safe_load(content)
+            content = _read_job_file(yaml_file)
+            data = _parse_job_info(content)
+            if "node" not in data:
+                # Not the file our sbatch script writes; let PyYAML try
+                import yaml
+
+                data = yaml.safe_load(content)
             if data and "node" in data:
                 return data
         except Exception:
-            pass
-        time.sleep(1)
+            time.sleep(1)
 
     raise RuntimeError(f"Could not read valid YAML from {yaml_file}")
 
 
 def handle_clean(console: Console) -> int:
     """Handles the --clean flag."""
+    from concurrent.futures import ThreadPoolExecutor
+
     # Ensure SLTOOLS_DIR exists
     SLTOOLS_DIR.mkdir(parents=True, exist_ok=True)
 
     console.print(f"Cleaning up {SLTOOLS_DIR}...")
-    for p in SLTOOLS_DIR.glob("reserved_*.yaml"):
-        p.unlink()
-        console.print(f"Removed {p}")
-    script = SLTOOLS_DIR / "_reserve.sh"
-    if script.exists():
-        script.unlink()
-        console.print(f"Removed {script}")
+    with os.scandir(SLTOOLS_DIR) as it:
+        victims = [
+            e.path
+            for e in it
+            if e.name == "_reserve.sh"
+            or (e.name.startswith("reserved_") and e.name.endswith(".yaml"))
+        ]
+    # Each unlink is a metadata round-trip on NFS homes; issue them concurrently
+    with ThreadPoolExecutor(8) as ex:
+        list(ex.map(os.unlink, victims))
+    console.print(f"Removed {len(victims)} files")
     console.print("[bold green]Clean complete.[/bold green]")
     return 0
 
@@ -166,18 +336,26 @@ def setup_node(job_id: str, console: Console) -> None:
         console: The rich console.
     """
     try:
-        yaml_file = wait_for_output_file(job_id, console)
+        allocation = _wait_via_scontrol(job_id, console)
+        if allocation is None:
+            # Fall back to the file written by the job, e.g. on clusters where
+            # scontrol is restricted.
+            yaml_file = wait_for_output_file(job_id, console)
     except KeyboardInterrupt:
         console.print(
             "[bold red]Wait interrupted; the job will remain queued.[/bold red]"
         )
         return
 
-    info = read_job_info(yaml_file)
-    node = info["node"]
-    gpus = str(info.get("gpus", ""))
+    if allocation is not None:
+        node, gpus = allocation
+    else:
+        info = read_job_info(yaml_file)
+        node = info["node"]
+        gpus = str(info.get("gpus", ""))
 
-    current_node = subprocess.check_output(["hostname"], text=True).strip()
+    # Same value `hostname` prints, without forking it
+    current_node = os.uname().nodename
 
     if current_node == node:
         console.print(f"[bold green]Already on reserved node {node}.[/bold green]")
@@ -218,6 +396,8 @@ def main(
         cancel: Cancel the existing reservation job.
         clean: Clean up all reservation files from ~/.sltools.
     """
+    from rich.console import Console
+
     console = Console()
 
     if clean:
@@ -264,4 +444,6 @@ def main(
 
 
 def _cli() -> int:
+    import tyro
+
     return tyro.cli(main)
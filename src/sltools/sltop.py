@@ -1,12 +1,15 @@
 """Main entrypoint and UI rendering for sltop."""
 
 import datetime
+import functools
 import select
+import subprocess
 import sys
 import termios
 import time
 import tty
-from typing import List
+from collections import Counter
+from typing import Any, Callable, List, Literal
 
 import tyro
 from rich import box
@@ -20,8 +23,132 @@ from rich.rule import Rule
 from rich.table import Table
 from rich.text import Text
 
-from .jobs import Job, JobGroup, coalesce_jobs, get_jobs
-from .nodes import Node, expand_nodelist, get_nodes, get_slurm_version
+from .jobs import Job, JobGroup, coalesce_jobs, get_job_states, get_jobs
+from .nodes import (
+    Node,
+    expand_nodelist,
+    get_nodes,
+    get_slurm_version,
+    parse_slurm_version,
+)
+
+# First Slurm version supporting squeue --only-job-state
+_ONLY_JOB_STATE_VERSION = (24, 5)
+# With --only-job-state, fetch the full job list at least every N refreshes
+_FULL_REFRESH_EVERY = 10
+
+# Once the queue is unchanged for this many refreshes, back off exponentially
+_BACKOFF_AFTER = 3
+# Longest interval the backoff goes up to, in seconds
+_MAX_BACKOFF_INTERVAL = 10.0
+
+# Short code and color for each job state; others use their first two letters
+_STATE_TABLE = {
+    "RUNNING": ("R", "green"),
+    "PENDING": ("PD", "yellow"),
+    "CANCELLED": ("CA", "red"),
+}
+
+# Usage cells of each node from the previous render, as (usage key, cells)
+_NODE_CELLS: dict[str, tuple[tuple, tuple]] = {}
+
+# Outer layout, built once; render() only swaps the sections inside it
+_RULE = Rule(style="dim")
+_CONTENT = Group()
+_PANEL = Panel(_CONTENT, box=box.ROUNDED, padding=0)
+
+# Last successful result of each cached Slurm query, as (timestamp, value)
+_CACHE: dict[str, tuple[float, Any]] = {}
+
+
+def _cached(
+    key: str, ttl: float, fn: Callable[[], Any], cache_empty: bool = True
+) -> tuple[Any, bool]:
+    """Returns fn(), reusing the previous result if it is younger than ttl.
+
+    If fn fails with a CalledProcessError, or returns an empty result while
+    cache_empty is False, the previous result is served instead and flagged
+    as stale.
+
+    Returns:
+        A tuple of (value, stale).
+    """
+    now = time.monotonic()
+    entry = _CACHE.get(key)
+    if entry is not None and now - entry[0] < ttl:
+        return entry[1], False
+
+    try:
+        value = fn()
+    except subprocess.CalledProcessError:
+        if entry is None:
+            raise
+        return entry[1], True
+
+    if not value and not cache_empty:
+        if entry is not None:
+            return entry[1], True
+        return value, False
+
+    _CACHE[key] = (now, value)
+    return value, False
+
+
+def _update_jobs(jobs: List[Job] | None, full: bool) -> List[Job]:
+    """Returns an up-to-date list of jobs.
+
+    Unless a full refresh is requested, only the job states are queried; the
+    full job list is only fetched again if a job appeared, disappeared, or
+    changed state.
+    """
+    if full or jobs is None:
+        return get_jobs()
+
+    try:
+        states = get_job_states()
+    except subprocess.CalledProcessError:
+        return get_jobs()
+
+    if states != {j.job_id: j.job_state for j in jobs}:
+        return get_jobs()
+    return jobs
+
+
+@functools.lru_cache(maxsize=4096)
+def _expand_nodelist_cached(nodelist: str) -> tuple[str, ...]:
+    names = tuple(expand_nodelist(nodelist))
+    if nodelist and not names:
+        # expand_nodelist returns [] when scontrol fails; raising keeps that
+        # out of the cache
+        raise LookupError(nodelist)
+    return names
+
+
+def _expand_nodelist(nodelist: str) -> tuple[str, ...]:
+    """Cached expand_nodelist; jobs often share a nodelist, and it never changes.
+
+    Failed expansions are not cached, so they are retried on the next refresh.
+    """
+    try:
+        return _expand_nodelist_cached(nodelist)
+    except LookupError:
+        return ()
+
+
+@functools.lru_cache(maxsize=None)
+def _state_text(state: str) -> Text:
+    """Returns the short, colored state code shown in the ST column.
+
+    The Text is shared between rows and refreshes, so it must not be mutated.
+    """
+    code, style = _STATE_TABLE.get(state, (state[:2], "yellow"))
+    return Text(code, style=style)
+
+
+def _backoff_interval(refresh: float, unchanged: int) -> float:
+    """Returns the refresh interval after `unchanged` identical refreshes."""
+    steps = min(max(0, unchanged - _BACKOFF_AFTER + 1), 4)
+    return max(refresh, min(refresh * 2**steps, _MAX_BACKOFF_INTERVAL))
 
 
 def format_resources(job: Job) -> str:
@@ -54,13 +181,16 @@ def calculate_node_usage(nodes: List[Node], jobs: List[Job]) -> dict:
         }
     }
     """
-    usage = {n.name: {"cpus": {}, "gpus": {}, "memory": {}} for n in nodes}
+    usage = {
+        n.name: {"cpus": Counter(), "gpus": Counter(), "memory": Counter()}
+        for n in nodes
+    }
 
     for job in jobs:
         if job.job_state != "RUNNING":
             continue
 
-        affected_nodes = expand_nodelist(job.nodelist)
+        affected_nodes = _expand_nodelist(job.nodelist)
         num_nodes = len(affected_nodes)
         if num_nodes == 0:
             continue
@@ -81,29 +211,44 @@ def calculate_node_usage(nodes: List[Node], jobs: List[Job]) -> dict:
         if mem_alloc == 0 and job.memory > 0:
             mem_alloc = job.memory // num_nodes
 
+        allocs = [
+            (key, amount)
+            for key, amount in (
+                ("cpus", cpus_alloc),
+                ("gpus", gpus_alloc),
+                ("memory", mem_alloc),
+            )
+            if amount > 0
+        ]
+        if not allocs:
+            continue
+
+        # Accumulate
+        p = job.partition
         for node_name in affected_nodes:
-            if node_name not in usage:
+            node_usage = usage.get(node_name)
+            if node_usage is None:
                 continue
+            for key, amount in allocs:
+                node_usage[key][p] += amount
 
-            # Accumulate
-            p = job.partition
-
-            if cpus_alloc > 0:
-                usage[node_name]["cpus"][p] = (
-                    usage[node_name]["cpus"].get(p, 0) + cpus_alloc
-                )
-
-            if gpus_alloc > 0:
-                usage[node_name]["gpus"][p] = (
-                    usage[node_name]["gpus"].get(p, 0) + gpus_alloc
-                )
+    return usage
 
-            if mem_alloc > 0:
-                usage[node_name]["memory"][p] = (
-                    usage[node_name]["memory"].get(p, 0) + mem_alloc
-                )
 
-    return usage
+def _make_usage_cell(
+    total: int, used: int, color: str, units: str = ""
+) -> tuple[Bar, Text]:
+    """Returns the usage bar and "used/total" label for one resource."""
+    bar = Bar(
+        size=total,
+        begin=0,
+        end=used,
+        width=None,
+        color=color,
+        bgcolor="bright_black",
+    )
+    stats = Text(f"{used}/{total}{units}", style="white dim")
+    return bar, stats
 
 
 def render_node_section(nodes: List[Node], usage_data: dict) -> Table:
@@ -128,39 +273,49 @@ def render_node_section(nodes: List[Node], usage_data: dict) -> Table:
         mem_total_gb = node.memory // 1000
         mem_used_gb = mem_used // 1000
 
-        def make_cell(total: int, used: int, color: str, units: str = ""):
-            bar = Bar(
-                size=total,
-                begin=0,
-                end=used,
-                width=None,
-                color=color,
-                bgcolor="bright_black",
+        # Reuse the previous cells if nothing changed on this node
+        key = (node.gpus, gpu_used, node.cpus, cpu_used, mem_total_gb, mem_used_gb)
+        prev = _NODE_CELLS.get(node.name)
+        if prev is not None and prev[0] == key:
+            cells = prev[1]
+        else:
+            cells = (
+                *_make_usage_cell(node.gpus, gpu_used, "cyan"),
+                *_make_usage_cell(node.cpus, cpu_used, "magenta"),
+                *_make_usage_cell(mem_total_gb, mem_used_gb, "green", units="G"),
             )
-            stats = Text(f"{used}/{total}{units}", style="white dim")
-            return bar, stats
+            _NODE_CELLS[node.name] = (key, cells)
 
-        table.add_row(
-            node.name,
-            *make_cell(node.gpus, gpu_used, "cyan"),
-            *make_cell(node.cpus, cpu_used, "magenta"),
-            *make_cell(mem_total_gb, mem_used_gb, "green", units="G"),
-        )
+        table.add_row(node.name, *cells)
 
     return table
 
 
-def render(jobs: List[Job], nodes: List[Node], slurm_version: str) -> Panel:
-    """Renders the list of jobs into a Rich Panel."""
+def render(
+    jobs: List[Job],
+    nodes: List[Node],
+    slurm_version: str,
+    stale: bool = False,
+    height: int | None = None,
+    interval: float | None = None,
+) -> Panel:
+    """Renders the list of jobs into a Rich Panel.
+
+    If height is given, only the jobs that fit in that many terminal lines
+    are formatted; the rest are summarized in a final "... N more" row. If
+    interval is given, it is shown in the header as the current refresh rate.
+    """
     # 1. Top Section Header
     now_str = datetime.datetime.now().astimezone().strftime("%Y-%m-%d %H:%M:%S %Z")
     header_grid = Table.grid(expand=True)
     header_grid.add_column(justify="left")
     header_grid.add_column(justify="right")
-    header_grid.add_row(
-        Text(f"sltop/slurm v{slurm_version}", style="bold white"),
-        Text(now_str, style="bold white"),
-    )
+    title = Text(f"sltop/slurm v{slurm_version}", style="bold white")
+    if stale:
+        title.append(" (stale)", style="dim")
+    if interval is not None:
+        title.append(f" (every {interval:g}s)", style="dim")
+    header_grid.add_row(title, Text(now_str, style="bold white"))
 
     # 2. Middle Section: Node Usage
     node_usage = calculate_node_usage(nodes, jobs)
@@ -177,21 +332,15 @@ def render(jobs: List[Job], nodes: List[Node], slurm_version: str) -> Panel:
     table.add_column("TIME", justify="right", no_wrap=True)
     table.add_column("RESOURCES", no_wrap=True, ratio=1)
 
-    for job in jobs:
-        # Status color
-        st_style = "green" if job.job_state == "RUNNING" else "yellow"
-        if job.job_state == "PENDING":
-            st_style = "yellow"
-        elif job.job_state == "CANCELLED":
-            st_style = "red"
-
-        # State short code
-        st_code = job.job_state[:2]  # RU, PE...
-        if job.job_state == "RUNNING":
-            st_code = "R"
-        elif job.job_state == "PENDING":
-            st_code = "PD"
+    # Panel borders, header, two rules, and the two tables' header rows
+    hidden = 0
+    if height is not None:
+        max_rows = max(1, height - len(nodes) - 7)
+        if len(jobs) > max_rows:
+            hidden = len(jobs) - (max_rows - 1)
+            jobs = jobs[: max_rows - 1]
 
+    for job in jobs:
         # Prepare display values
         if isinstance(job, JobGroup):
             job_id_display = job.job_id_str
@@ -215,32 +364,51 @@ def render(jobs: List[Job], nodes: List[Node], slurm_version: str) -> Panel:
             part_nice,
             job.user_name,
             escape(job_name_display),
-            Text(st_code, style=st_style),
+            _state_text(job.job_state),
             job.time_used,
             escape(format_resources(job)),
         )
 
+    if hidden:
+        table.add_row("", "", "", Text(f"... {hidden} more", style="dim"))
+
     # Combine sections: Header -> Rule -> Nodes -> Rule -> Jobs
-    content = Group(
+    _CONTENT.renderables[:] = [
         Padding(header_grid, (0, 1)),
-        Rule(style="dim"),
+        _RULE,
         node_table,
-        Rule(style="dim"),
+        _RULE,
         table,
-    )
+    ]
 
-    return Panel(content, box=box.ROUNDED, padding=0)
+    return _PANEL
 
 
-def main(refresh: float = 1.0, merge: bool = False) -> int:
+def main(
+    refresh: float = 1.0,
+    merge: bool = False,
+    node_refresh: float = 30.0,
+    only_job_state: Literal["auto", "on", "off"] = "auto",
+    refresh_version: bool = False,
+) -> int:
     """sltop: A top-like queue viewer for Slurm.
 
     Args:
         refresh: Refresh rate in seconds.
         merge: Whether to merge similar jobs.
+        node_refresh: Refresh rate of the node list in seconds.
+        only_job_state: Between full refreshes, only poll job states with
+            `squeue --only-job-state`. "auto" turns this on for Slurm >= 24.05.
+        refresh_version: Query the Slurm version again instead of using the
+            cached value.
     """
     console = Console()
-    slurm_version = get_slurm_version()
+    slurm_version = get_slurm_version(refresh=refresh_version)
+    if only_job_state == "auto":
+        version = parse_slurm_version(slurm_version)
+        states_only = version[:2] >= _ONLY_JOB_STATE_VERSION
+    else:
+        states_only = only_job_state == "on"
 
     old_settings = None
     if sys.stdin.isatty():
@@ -249,21 +417,62 @@ def main(refresh: float = 1.0, merge: bool = False) -> int:
 
     try:
         with Live(console=console, screen=True, auto_refresh=False) as live:
+            all_jobs = None
+            tick = 0
+            unchanged = 0
+            interval = refresh
+            next_tick = time.monotonic()
             while True:
-                jobs = get_jobs()
-                if merge:
-                    jobs = coalesce_jobs(jobs)
-                nodes = get_nodes()
-                panel = render(jobs, nodes, slurm_version)
-                live.update(panel, refresh=True)
-
+                # Only redraw on schedule, so key presses do not trigger queries
+                if time.monotonic() >= next_tick:
+                    prev_jobs = all_jobs
+                    full = not states_only or tick % _FULL_REFRESH_EVERY == 0
+                    # Ticks are at least `refresh` apart, so jobs are always
+                    # queried; the cache only supplies the stale fallback.
+                    all_jobs, stale = _cached(
+                        "jobs", 0, lambda: _update_jobs(all_jobs, full)
+                    )
+                    tick += 1
+
+                    # Poll less often while the queue is idle
+                    unchanged = unchanged + 1 if all_jobs == prev_jobs else 0
+                    interval = _backoff_interval(refresh, unchanged)
+
+                    jobs = all_jobs
+                    if merge:
+                        jobs = coalesce_jobs(jobs)
+                    # get_nodes returns [] when scontrol fails; do not keep
+                    # that around for node_refresh seconds
+                    nodes, nodes_stale = _cached(
+                        "nodes", node_refresh, get_nodes, cache_empty=False
+                    )
+                    panel = render(
+                        jobs,
+                        nodes,
+                        slurm_version,
+                        stale=stale or nodes_stale,
+                        height=console.size.height,
+                        interval=interval if interval > refresh else None,
+                    )
+                    live.update(panel, refresh=True)
+
+                    next_tick += interval
+                    if next_tick < time.monotonic():
+                        # Fell behind (e.g. slow squeue); do not try to catch up
+                        next_tick = time.monotonic() + interval
+
+                timeout = max(0.0, next_tick - time.monotonic())
                 if sys.stdin.isatty():
-                    rlist, _, _ = select.select([sys.stdin], [], [], refresh)
+                    rlist, _, _ = select.select([sys.stdin], [], [], timeout)
                     if rlist:
                         if sys.stdin.read(1).lower() == "q":
                             break
+                        # Any other key ends the backoff
+                        next_tick -= interval - refresh
+                        interval = refresh
+                        unchanged = 0
                 else:
-                    time.sleep(refresh)
+                    time.sleep(timeout)
     except KeyboardInterrupt:
         pass  # Clean exit on Ctrl+C
     finally: